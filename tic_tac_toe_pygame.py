@@ -1,60 +1,95 @@
 import pygame
+from pygame._sdl2.video import Window, Renderer, Texture
 import sys
-import json
 import os
 import random
 import math
+import functools
+import numpy as np
 
 # ==================================================
 #              Q-LEARNING: LOAD TABLE
 # ==================================================
-Q_TABLE_FILE = "q_table.json"
-Q = {}
+Q_TABLE_FILE = "q_table.npz"
+# board -> array of 9 Q-values, one per cell (0.0 where unknown).
+# A board is keyed as one int: (x_mask << 9) | o_mask.
+Q_VEC = {}
+CELL_INDICES = np.arange(9)
+
+def state_to_board(state_str):
+    """Return the board int for a 9-char state string."""
+    x_mask = 0
+    o_mask = 0
+    for i, ch in enumerate(state_str):
+        if ch == 'X':
+            x_mask |= 1 << i
+        elif ch == 'O':
+            o_mask |= 1 << i
+    return (x_mask << 9) | o_mask
 
 def load_q_table(file_path):
-    global Q
+    global Q_VEC
+    Q_VEC = {}
     if os.path.exists(file_path):
-        with open(file_path, "r") as f:
-            q_data = json.load(f)
-        for state, actions in q_data.items():
-            for action_str, value in actions.items():
-                action = int(action_str)
-                Q[(state, action)] = value
+        with np.load(file_path) as data:
+            states, qvals = data["states"], data["qvals"]
+        for state, row in zip(states, qvals):
+            Q_VEC[state_to_board(state)] = row
     else:
         print("[INFO] No Q-table file found. AI might play randomly!")
-        Q = {}
+    best_known_action.cache_clear()
 
-def get_q_value(state, action):
-    return Q.get((state, action), 0.0)
+def free_cells(free):
+    """Return a boolean array marking the cells set in the free-cell mask."""
+    return (free >> CELL_INDICES) & 1 == 1
 
-def choose_best_action(state):
+@functools.lru_cache(maxsize=8192)
+def best_known_action(board):
+    """
+    Return the best action for a non-full board from Q, or None if all its
+    valid actions have Q=0. Q doesn't change during play, so this is cached.
+    """
+    qvals = Q_VEC.get(board)
+    if qvals is None:
+        return None
+    valid = free_cells(~((board >> 9) | board) & FULL_BOARD)
+    if not qvals[valid].any():
+        return None
+    return int(np.argmax(np.where(valid, qvals, -np.inf)))
+
+def choose_best_action(x_mask, o_mask):
     """Pick the best known action from Q, or random if unknown."""
-    valid_actions = [i for i, ch in enumerate(state) if ch == ' ']
-    if not valid_actions:
+    free = ~(x_mask | o_mask) & FULL_BOARD
+    if not free:
         return None
-    qvals = [(get_q_value(state, a), a) for a in valid_actions]
-    # If all Q=0 => random
-    if all(qv[0] == 0.0 for qv in qvals):
-        return random.choice(valid_actions)
+    action = best_known_action((x_mask << 9) | o_mask)
+    # If all Q=0 => random (kept outside the cache so it stays random)
+    if action is None:
+        return int(random.choice(np.flatnonzero(free_cells(free))))
     # Otherwise pick best
-    return max(qvals, key=lambda x: x[0])[1]
+    return action
 
 # ==================================================
 #              GAME LOGIC
 # ==================================================
-def check_winner(state, symbol):
-    wins = [
-        (0,1,2), (3,4,5), (6,7,8),
-        (0,3,6), (1,4,7), (2,5,8),
-        (0,4,8), (2,4,6)
-    ]
-    for (a,b,c) in wins:
-        if state[a] == state[b] == state[c] == symbol:
+# Winning lines as 9-bit masks (bit i = cell i)
+WIN_MASKS = (
+    0b000000111, 0b000111000, 0b111000000,  # rows
+    0b001001001, 0b010010010, 0b100100100,  # cols
+    0b100010001, 0b001010100                # diagonals
+)
+
+def check_winner(mask):
+    """Return True if the cells in mask (one player's moves) complete a line."""
+    for w in WIN_MASKS:
+        if mask & w == w:
             return True
     return False
 
-def is_draw(state):
-    return ' ' not in state
+FULL_BOARD = 0x1FF  # all 9 cells taken
+
+def is_draw(x_mask, o_mask):
+    return (x_mask | o_mask) == FULL_BOARD
 
 # ==================================================
 #              PYGAME SETUP
@@ -67,6 +102,11 @@ LEFT_MARGIN = (WINDOW_SIZE - BOARD_SIZE) // 2
 
 CELL_SIZE = BOARD_SIZE // 3
 
+# Top-left corner, center and screen rect of each cell, indexed 0..8
+CELL_POS = [(LEFT_MARGIN + (i % 3)*CELL_SIZE, TOP_MARGIN + (i // 3)*CELL_SIZE) for i in range(9)]
+CELL_CENTER = [(x + CELL_SIZE//2, y + CELL_SIZE//2) for x, y in CELL_POS]
+CELL_RECTS = [pygame.Rect(pos, (CELL_SIZE, CELL_SIZE)) for pos in CELL_POS]
+
 # Colors
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
@@ -82,8 +122,10 @@ GRADIENT_BOTTOM = (24, 52, 105) # navy
 X_COLOR = (240, 50, 50)
 O_COLOR = (50, 120, 240)
 
-screen = pygame.display.set_mode((WINDOW_SIZE, WINDOW_SIZE))
-pygame.display.set_caption("Modern Tic-Tac-Toe with Q-Learning AI")
+# Hardware-accelerated renderer: everything is drawn as Textures, which SDL
+# can batch into a few GPU draw calls per frame.
+window = Window("Modern Tic-Tac-Toe with Q-Learning AI", size=(WINDOW_SIZE, WINDOW_SIZE))
+renderer = Renderer(window, vsync=True)
 
 # Fonts
 pygame.font.init()
@@ -92,6 +134,19 @@ MOVE_FONT = pygame.font.SysFont("Verdana", 90, bold=True)
 RESULT_FONT = pygame.font.SysFont("Verdana", 50, bold=True)
 BTN_FONT = pygame.font.SysFont("Verdana", 25)
 
+# None of the text ever changes, so rasterize each string once up front
+TITLE_TEX = Texture.from_surface(renderer, TITLE_FONT.render("Tic-Tac-Toe", True, WHITE))
+X_SURF = MOVE_FONT.render('X', True, X_COLOR)
+O_SURF = MOVE_FONT.render('O', True, O_COLOR)
+RESULT_TEXS = {
+    message: Texture.from_surface(renderer, RESULT_FONT.render(message, True, WHITE))
+    for message in ("You Win!", "AI Wins!", "It's a Draw!")
+}
+BTN_SURFS = {
+    label: BTN_FONT.render(label, True, WHITE)
+    for label in ("New", "Exit")
+}
+
 # Optional images for X, O
 try:
     X_IMG = pygame.image.load("X.png")
@@ -103,29 +158,44 @@ try:
 except:
     USE_IMAGES = False
 
+# Texture atlas holding a cell-sized X tile and O tile side by side, so every
+# mark is drawn from the same texture at its CELL_POS.
+TILE_ATLAS = pygame.Surface((CELL_SIZE*2, CELL_SIZE), pygame.SRCALPHA)
+X_SRC = pygame.Rect(0, 0, CELL_SIZE, CELL_SIZE)
+O_SRC = pygame.Rect(CELL_SIZE, 0, CELL_SIZE, CELL_SIZE)
+if USE_IMAGES:
+    TILE_ATLAS.blit(X_IMG, X_SRC)
+    TILE_ATLAS.blit(O_IMG, O_SRC)
+else:
+    TILE_ATLAS.blit(X_SURF, X_SURF.get_rect(center=X_SRC.center))
+    TILE_ATLAS.blit(O_SURF, O_SURF.get_rect(center=O_SRC.center))
+TILE_SRC = {'X': X_SRC, 'O': O_SRC}
+TILE_ATLAS_TEX = Texture.from_surface(renderer, TILE_ATLAS)
+
 clock = pygame.time.Clock()
+AI_MOVE_DELAY_MS = 500  # pause before the AI answers, so its move is visible
 
 # ==================================================
 #         DRAWING FUNCTIONS FOR MODERN UI
 # ==================================================
-def draw_gradient_background(top_color, bottom_color, width, height):
+def render_gradient_background(top_color, bottom_color, width, height):
     """
-    Draw a vertical gradient from top_color to bottom_color.
+    Render a vertical gradient from top_color to bottom_color into a new Surface.
     """
-    # We'll draw horizontal lines from top to bottom, blending the color.
-    for y in range(height):
-        ratio = y / height
-        r = int(top_color[0] + (bottom_color[0] - top_color[0]) * ratio)
-        g = int(top_color[1] + (bottom_color[1] - top_color[1]) * ratio)
-        b = int(top_color[2] + (bottom_color[2] - top_color[2]) * ratio)
-        pygame.draw.line(screen, (r, g, b), (0, y), (width, y))
+    surface = pygame.Surface((width, height))
+    # Blend the color for every row at once, then repeat each row across the width.
+    ratio = (np.arange(height) / height)[:, None]
+    top = np.array(top_color, dtype=np.float64)
+    bottom = np.array(bottom_color, dtype=np.float64)
+    row_colors = (top + (bottom - top) * ratio).astype(np.uint8)
+    # surfarray indexes pixels as [x, y]
+    pygame.surfarray.blit_array(surface, np.broadcast_to(row_colors, (width, height, 3)))
+    return surface
 
 def draw_title_text():
-    text_surf = TITLE_FONT.render("Tic-Tac-Toe", True, WHITE)
-    text_rect = text_surf.get_rect(center=(WINDOW_SIZE//2, 40))
-    screen.blit(text_surf, text_rect)
+    TITLE_TEX.draw(dstrect=TITLE_TEX.get_rect(center=(WINDOW_SIZE//2, 40)))
 
-def draw_grid_lines():
+def draw_grid_lines(surface):
     """Draw lines with a 'shadow' effect for a modern look."""
     line_thickness = 5
 
@@ -137,42 +207,32 @@ def draw_grid_lines():
     for c in range(1, 3):
         x = LEFT_MARGIN + c*CELL_SIZE
         # shadow
-        pygame.draw.line(screen, shadow_color, (x+2, TOP_MARGIN+2), (x+2, TOP_MARGIN+BOARD_SIZE+2), line_thickness)
+        pygame.draw.line(surface, shadow_color, (x+2, TOP_MARGIN+2), (x+2, TOP_MARGIN+BOARD_SIZE+2), line_thickness)
         # main line
-        pygame.draw.line(screen, BLACK, (x, TOP_MARGIN), (x, TOP_MARGIN+BOARD_SIZE), line_thickness)
+        pygame.draw.line(surface, BLACK, (x, TOP_MARGIN), (x, TOP_MARGIN+BOARD_SIZE), line_thickness)
 
     # Horizontal lines
     for r in range(1, 3):
         y = TOP_MARGIN + r*CELL_SIZE
         # shadow
-        pygame.draw.line(screen, shadow_color, (LEFT_MARGIN+2, y+2), (LEFT_MARGIN+BOARD_SIZE+2, y+2), line_thickness)
+        pygame.draw.line(surface, shadow_color, (LEFT_MARGIN+2, y+2), (LEFT_MARGIN+BOARD_SIZE+2, y+2), line_thickness)
         # main line
-        pygame.draw.line(screen, BLACK, (LEFT_MARGIN, y), (LEFT_MARGIN+BOARD_SIZE, y), line_thickness)
+        pygame.draw.line(surface, BLACK, (LEFT_MARGIN, y), (LEFT_MARGIN+BOARD_SIZE, y), line_thickness)
 
-def draw_board(board_list):
+# The gradient and the grid never change, so bake both into one texture
+# at startup and just draw it every frame.
+BG_SURFACE = render_gradient_background(GRADIENT_TOP, GRADIENT_BOTTOM, WINDOW_SIZE, WINDOW_SIZE)
+draw_grid_lines(BG_SURFACE)
+BG_TEX = Texture.from_surface(renderer, BG_SURFACE)
+
+def draw_board(state_str):
     """
     Draw X or O with large font or images in each cell.
     """
-    for i, cell in enumerate(board_list):
-        row = i // 3
-        col = i % 3
-        x_pos = LEFT_MARGIN + col*CELL_SIZE
-        y_pos = TOP_MARGIN + row*CELL_SIZE
-
-        if cell == 'X':
-            if USE_IMAGES:
-                screen.blit(X_IMG, (x_pos, y_pos))
-            else:
-                text_surf = MOVE_FONT.render('X', True, X_COLOR)
-                rect = text_surf.get_rect(center=(x_pos + CELL_SIZE//2, y_pos + CELL_SIZE//2))
-                screen.blit(text_surf, rect)
-        elif cell == 'O':
-            if USE_IMAGES:
-                screen.blit(O_IMG, (x_pos, y_pos))
-            else:
-                text_surf = MOVE_FONT.render('O', True, O_COLOR)
-                rect = text_surf.get_rect(center=(x_pos + CELL_SIZE//2, y_pos + CELL_SIZE//2))
-                screen.blit(text_surf, rect)
+    for i, cell in enumerate(state_str):
+        area = TILE_SRC.get(cell)
+        if area is not None:
+            TILE_ATLAS_TEX.draw(srcrect=area, dstrect=CELL_RECTS[i])
 
 def get_cell_index(mx, my):
     if (mx < LEFT_MARGIN or mx > LEFT_MARGIN + BOARD_SIZE or
@@ -192,47 +252,61 @@ def draw_rounded_rect(surface, rect, color, radius=15):
     """
     pygame.draw.rect(surface, color, rect, border_radius=radius)
 
-def draw_button(rect, text, base_color, hover_color, text_color=WHITE):
+def render_button(size, text, color):
     """
-    Draw a button with a hover effect. Return True if hovered, else False.
+    Render a rounded button of the given size, with its label centered,
+    into a new transparent Surface. The label must be one of BTN_SURFS.
     """
-    mouse_pos = pygame.mouse.get_pos()
-    if rect.collidepoint(mouse_pos):
-        color = hover_color
-    else:
-        color = base_color
-
-    draw_rounded_rect(screen, rect, color, radius=12)
+    surface = pygame.Surface(size, pygame.SRCALPHA)
+    draw_rounded_rect(surface, surface.get_rect(), color, radius=12)
     # Center text
-    text_surf = BTN_FONT.render(text, True, text_color)
-    text_rect = text_surf.get_rect(center=rect.center)
-    screen.blit(text_surf, text_rect)
-
-    # Check for click
-    mouse_click = pygame.mouse.get_pressed()
-    if mouse_click[0] and rect.collidepoint(mouse_pos):
-        return True
-    return False
+    text_surf = BTN_SURFS[text]
+    surface.blit(text_surf, text_surf.get_rect(center=surface.get_rect().center))
+    return surface
+
+def draw_button(rect, text):
+    """
+    Draw a button with a hover effect. Return True if hovered, else False.
+    Clicks are handled from MOUSEBUTTONDOWN events in the main loop.
+    """
+    hovered = rect.collidepoint(pygame.mouse.get_pos())
+    BTN_TEXS[text, hovered].draw(dstrect=rect)
+    return hovered
+
+# Dimmed backdrop for the endgame overlay, allocated and filled only once
+OVERLAY_DIM = pygame.Surface((WINDOW_SIZE, WINDOW_SIZE), pygame.SRCALPHA)
+OVERLAY_DIM.fill((0, 0, 0, 150))  # black w/ alpha 150
+OVERLAY_DIM_TEX = Texture.from_surface(renderer, OVERLAY_DIM)
+
+# Endgame buttons: "New Game" and "Exit"
+NEW_BTN_RECT = pygame.Rect(WINDOW_SIZE//2 - 120, WINDOW_SIZE//2, 100, 40)
+QUIT_BTN_RECT = pygame.Rect(WINDOW_SIZE//2 + 20, WINDOW_SIZE//2, 100, 40)
+
+# (label, hovered) -> button texture, in its base and hover colors
+BTN_TEXS = {
+    (label, hovered): Texture.from_surface(
+        renderer, render_button(NEW_BTN_RECT.size, label, HOVER_GRAY if hovered else (70,70,70)))
+    for label in BTN_SURFS
+    for hovered in (False, True)
+}
+
+def get_hovered_button(pos):
+    """Return the endgame button rect under pos, or None."""
+    for rect in (NEW_BTN_RECT, QUIT_BTN_RECT):
+        if rect.collidepoint(pos):
+            return rect
+    return None
 
 # Overlay for endgame (win/draw)
 def draw_overlay(message):
-    overlay = pygame.Surface((WINDOW_SIZE, WINDOW_SIZE), pygame.SRCALPHA)
-    overlay.fill((0, 0, 0, 150))  # black w/ alpha 150
-    screen.blit(overlay, (0, 0))
+    OVERLAY_DIM_TEX.draw()
 
     # Draw the message
-    text_surf = RESULT_FONT.render(message, True, WHITE)
-    text_rect = text_surf.get_rect(center=(WINDOW_SIZE//2, WINDOW_SIZE//2 - 60))
-    screen.blit(text_surf, text_rect)
-
-    # "New Game" button
-    new_btn_rect = pygame.Rect(WINDOW_SIZE//2 - 120, WINDOW_SIZE//2, 100, 40)
-    quit_btn_rect = pygame.Rect(WINDOW_SIZE//2 + 20, WINDOW_SIZE//2, 100, 40)
+    text_tex = RESULT_TEXS[message]
+    text_tex.draw(dstrect=text_tex.get_rect(center=(WINDOW_SIZE//2, WINDOW_SIZE//2 - 60)))
 
-    new_clicked = draw_button(new_btn_rect, "New", (70,70,70), HOVER_GRAY)
-    quit_clicked = draw_button(quit_btn_rect, "Exit", (70,70,70), HOVER_GRAY)
-
-    return new_clicked, quit_clicked
+    draw_button(NEW_BTN_RECT, "New")
+    draw_button(QUIT_BTN_RECT, "Exit")
 
 # ==================================================
 #               MAIN LOOP
@@ -240,7 +314,8 @@ def draw_overlay(message):
 def main():
     load_q_table(Q_TABLE_FILE)
 
-    board = [' '] * 9
+    state_str = ' ' * 9  # authoritative board, one char per cell
+    masks = {'X': 0, 'O': 0}  # bitmask of each player's cells
     user_symbol = 'X'
     ai_symbol = 'O'
     current_symbol = 'X'  # X goes first
@@ -249,79 +324,102 @@ def main():
     game_over = False
     result_message = ""
 
-    while running:
-        # 1) Draw a gradient background
-        draw_gradient_background(GRADIENT_TOP, GRADIENT_BOTTOM, WINDOW_SIZE, WINDOW_SIZE)
+    # Only redraw when something visible changed
+    dirty = True
+    hovered_btn = None
 
-        # 2) Title
-        draw_title_text()
+    # Time (pygame ticks) at which the AI should play, or None if not its turn
+    ai_move_due_ms = None
+
+    while running:
+        if dirty:
+            # 1) Draw the cached gradient background (grid lines included)
+            BG_TEX.draw()
 
-        # 3) Grid lines
-        draw_grid_lines()
+            # 2) Title
+            draw_title_text()
 
-        # 4) Board
-        draw_board(board)
+            # 3) Board
+            draw_board(state_str)
 
-        # 5) If game_over, show an overlay with "New" or "Exit"
-        new_game_clicked = False
-        quit_clicked = False
-        if game_over:
-            new_game_clicked, quit_clicked = draw_overlay(result_message)
+            # 4) If game_over, show an overlay with "New" or "Exit"
+            if game_over:
+                draw_overlay(result_message)
+                hovered_btn = get_hovered_button(pygame.mouse.get_pos())
 
-        pygame.display.update()
+            renderer.present()
+            dirty = False
 
-        # 6) Event handling
+        # 5) Event handling
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
                 break
 
-            if not game_over:
+            if event.type == pygame.WINDOWEXPOSED:
+                dirty = True
+
+            if game_over:
+                # Redraw when the hovered button changes
+                if event.type == pygame.MOUSEMOTION:
+                    btn = get_hovered_button(event.pos)
+                    if btn is not hovered_btn:
+                        hovered_btn = btn
+                        dirty = True
+                # "New" or "Exit" clicked
+                elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                    btn = get_hovered_button(event.pos)
+                    if btn is NEW_BTN_RECT:
+                        # Reset
+                        state_str = ' ' * 9
+                        masks = {'X': 0, 'O': 0}
+                        current_symbol = 'X'
+                        result_message = ""
+                        game_over = False
+                        dirty = True
+                    elif btn is QUIT_BTN_RECT:
+                        running = False
+                        break
+            else:
                 # If user clicks on board area
                 if event.type == pygame.MOUSEBUTTONDOWN and current_symbol == user_symbol:
-                    mx, my = pygame.mouse.get_pos()
+                    mx, my = event.pos
                     idx = get_cell_index(mx, my)
-                    if idx is not None and board[idx] == ' ':
-                        board[idx] = user_symbol
+                    if idx is not None and state_str[idx] == ' ':
+                        state_str = state_str[:idx] + user_symbol + state_str[idx+1:]
+                        masks[user_symbol] |= 1 << idx
+                        dirty = True
                         # Check outcome
-                        if check_winner(''.join(board), user_symbol):
+                        if check_winner(masks[user_symbol]):
                             result_message = "You Win!"
                             game_over = True
-                        elif is_draw(''.join(board)):
+                        elif is_draw(masks['X'], masks['O']):
                             result_message = "It's a Draw!"
                             game_over = True
                         else:
                             current_symbol = ai_symbol
+                            ai_move_due_ms = pygame.time.get_ticks() + AI_MOVE_DELAY_MS
 
-        # 7) Handle AI turn
-        if not game_over and current_symbol == ai_symbol:
-            pygame.time.wait(500)
-            state_str = ''.join(board)
-            ai_move = choose_best_action(state_str)
+        # 6) Handle AI turn once its delay has passed, without blocking the loop
+        if ai_move_due_ms is not None and pygame.time.get_ticks() >= ai_move_due_ms:
+            ai_move_due_ms = None
+            ai_move = choose_best_action(masks['X'], masks['O'])
             if ai_move is not None:
-                board[ai_move] = ai_symbol
-                if check_winner(''.join(board), ai_symbol):
+                state_str = state_str[:ai_move] + ai_symbol + state_str[ai_move+1:]
+                masks[ai_symbol] |= 1 << ai_move
+                dirty = True
+                if check_winner(masks[ai_symbol]):
                     result_message = "AI Wins!"
                     game_over = True
-                elif is_draw(''.join(board)):
+                elif is_draw(masks['X'], masks['O']):
                     result_message = "It's a Draw!"
                     game_over = True
             else:
                 result_message = "It's a Draw!"
                 game_over = True
+                dirty = True
             current_symbol = user_symbol
 
-        # 8) If game_over, check if user clicked "New" or "Exit"
-        if game_over:
-            if new_game_clicked:
-                # Reset
-                board = [' '] * 9
-                current_symbol = 'X'
-                result_message = ""
-                game_over = False
-            elif quit_clicked:
-                running = False
-
         clock.tick(30)
 
     pygame.quit()
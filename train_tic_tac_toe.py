@@ -1,6 +1,13 @@
 import random
-import json
 import os
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    # Without numba the same functions just run as plain (slower) Python
+    def njit(*args, **kwargs):
+        return lambda func: func
 
 # Hyperparameters
 ALPHA = 0.5     # Learning rate
@@ -13,178 +20,205 @@ REWARD_WIN = 1.0
 REWARD_LOSE = -1.0
 REWARD_DRAW = 0.0
 
-SAVE_FILE = "q_table.json"
-
-# Q-table: dict((state, action) -> q_value)
-Q = {}
+SAVE_FILE = "q_table.npz"
+
+# A board is stored as one int: (x_mask << 9) | o_mask, where bit i of
+# each 9-bit mask is set if that player holds cell i.
+NUM_BOARDS = 1 << 18
+
+# Q-table: Q[board, action] -> q_value (0.0 if never updated).
+# SEEN marks the boards that were actually updated, so only those are saved.
+Q = np.zeros((NUM_BOARDS, 9))
+SEEN = np.zeros(NUM_BOARDS, dtype=np.bool_)
+
+def board_to_state(board):
+    """Return the 9-char state string ('X', 'O', ' ') for a board int."""
+    x_mask = board >> 9
+    o_mask = board & 0x1FF
+    return "".join(
+        'X' if x_mask >> i & 1 else 'O' if o_mask >> i & 1 else ' '
+        for i in range(9)
+    )
+
+def state_to_board(state_str):
+    """Return the board int for a 9-char state string."""
+    x_mask = 0
+    o_mask = 0
+    for i, ch in enumerate(state_str):
+        if ch == 'X':
+            x_mask |= 1 << i
+        elif ch == 'O':
+            o_mask |= 1 << i
+    return (x_mask << 9) | o_mask
 
 def save_q_table(file_path=SAVE_FILE):
-    """Save the Q dictionary to a JSON file."""
-    with open(file_path, "w") as f:
-        # We can't directly dump a dict with tuple keys, so we transform
-        q_data = {}
-        for (state, action), value in Q.items():
-            # state is a string, action is an int
-            # we'll store them as strings
-            if state not in q_data:
-                q_data[state] = {}
-            q_data[state][str(action)] = value
-        json.dump(q_data, f)
+    """
+    Save the updated Q rows to a compressed .npz file: 'states' holds the
+    9-char state strings and 'qvals' the matching (N, 9) Q-values.
+    """
+    boards = np.flatnonzero(SEEN)
+    states = np.array([board_to_state(int(b)) for b in boards], dtype="U9")
+    np.savez_compressed(file_path, states=states, qvals=Q[boards])
 
 def load_q_table(file_path=SAVE_FILE):
-    """Load Q dictionary from a JSON file if it exists."""
-    global Q
+    """Load Q from a .npz file if it exists."""
+    Q.fill(0.0)
+    SEEN.fill(False)
     if os.path.exists(file_path):
-        with open(file_path, "r") as f:
-            q_data = json.load(f)
-        # Convert the action keys back to int
-        for state, actions in q_data.items():
-            for action_str, value in actions.items():
-                action = int(action_str)
-                Q[(state, action)] = value
-    else:
-        Q = {}
+        with np.load(file_path) as data:
+            states, qvals = data["states"], data["qvals"]
+        boards = [state_to_board(state) for state in states]
+        Q[boards] = qvals
+        SEEN[boards] = True
 
 # ---------------------------
 #  TIC-TAC-TOE GAME LOGIC
 # ---------------------------
-def initial_state():
-    """Return an empty 9-char board for new game."""
-    return "         "  # 9 spaces
-
-def available_actions(state_str):
-    """Return a list of valid move indices (0..8) where state_str is blank."""
-    return [i for i, ch in enumerate(state_str) if ch == ' ']
-
-def next_state(state_str, action, symbol):
-    """
-    Return the new state string after 'symbol' ('X'/'O') 
-    plays in position 'action' (0..8).
-    """
-    lst = list(state_str)
-    lst[action] = symbol
-    return "".join(lst)
-
-def check_winner(state_str, symbol):
-    """Return True if symbol has won in the given state_str."""
-    wins = [
-        (0,1,2), (3,4,5), (6,7,8),  # rows
-        (0,3,6), (1,4,7), (2,5,8),  # cols
-        (0,4,8), (2,4,6)            # diagonals
-    ]
-    for (a,b,c) in wins:
-        if state_str[a] == state_str[b] == state_str[c] == symbol:
+FULL_BOARD = 0x1FF  # all 9 cells taken
+
+# Winning lines as 9-bit masks (bit i = cell i)
+WIN_MASKS = (
+    0b000000111, 0b000111000, 0b111000000,  # rows
+    0b001001001, 0b010010010, 0b100100100,  # cols
+    0b100010001, 0b001010100                # diagonals
+)
+
+# Cell index of each single-bit mask (1 << i -> i), used for bit scans
+BIT_INDEX = np.zeros(FULL_BOARD + 1, dtype=np.int64)
+for _i in range(9):
+    BIT_INDEX[1 << _i] = _i
+
+@njit(cache=True)
+def check_winner(mask):
+    """Return True if mask (the cells held by one symbol) contains a winning line."""
+    for w in WIN_MASKS:
+        if mask & w == w:
             return True
     return False
 
-def is_draw(state_str):
+@njit(cache=True)
+def actions_from_mask(free_mask):
+    """Return the indices of the set bits in free_mask, lowest first."""
+    out = []
+    while free_mask:
+        b = free_mask & -free_mask  # isolate the lowest set bit
+        out.append(int(BIT_INDEX[b]))
+        free_mask ^= b
+    return out
+
+@njit(cache=True)
+def available_actions(board):
+    """Return a list of valid move indices (0..8) that are still free."""
+    return actions_from_mask(~((board >> 9) | board) & FULL_BOARD)
+
+@njit(cache=True)
+def is_draw(board):
     """Return True if board is full and no winner."""
-    return ' ' not in state_str
+    return ((board >> 9) | board) & FULL_BOARD == FULL_BOARD
 
 # ---------------------------
 #  Q-LEARNING SUPPORT
 # ---------------------------
-def get_q_value(state, action):
-    """Return the Q-value for (state, action) or 0.0 if not in Q."""
-    return Q.get((state, action), 0.0)
-
-def best_action(state):
-    """Return the action with the highest Q-value for this state."""
-    acts = available_actions(state)
-    if not acts:
-        return None
-    # sort by Q-value descending
-    best = max(acts, key=lambda a: get_q_value(state, a))
+@njit(cache=True)
+def best_action(Q, board):
+    """Return the action with the highest Q-value for this board."""
+    acts = available_actions(board)
+    if len(acts) == 0:
+        return -1
+    best = acts[0]
+    for a in acts:
+        if Q[board, a] > Q[board, best]:
+            best = a
     return best
 
-def epsilon_greedy_action(state, epsilon):
-    """Return an action using epsilon-greedy strategy."""
-    acts = available_actions(state)
-    if not acts:
-        return None
+@njit(cache=True)
+def epsilon_greedy_action(Q, board, epsilon):
+    """Return an action (-1 if none) using epsilon-greedy strategy."""
+    acts = available_actions(board)
+    if len(acts) == 0:
+        return -1
     if random.random() < epsilon:
-        return random.choice(acts)  # explore
+        return acts[random.randrange(len(acts))]  # explore
     else:
-        return best_action(state)   # exploit
+        return best_action(Q, board)               # exploit
 
-def update_q_value(old_state, action, reward, new_state):
+@njit(cache=True)
+def update_q_value(Q, seen, old_board, action, reward, new_board):
     """Apply the Q-learning update rule."""
-    old_q = get_q_value(old_state, action)
+    old_q = Q[old_board, action]
     max_q_next = 0.0
-    next_acts = available_actions(new_state)
-    if next_acts:
-        max_q_next = max(get_q_value(new_state, a) for a in next_acts)
-    new_q = old_q + ALPHA * (reward + GAMMA * max_q_next - old_q)
-    Q[(old_state, action)] = new_q
-
-def play_one_game(epsilon):
+    next_acts = available_actions(new_board)
+    if len(next_acts) > 0:
+        max_q_next = Q[new_board, next_acts[0]]
+        for a in next_acts:
+            max_q_next = max(max_q_next, Q[new_board, a])
+    Q[old_board, action] = old_q + ALPHA * (reward + GAMMA * max_q_next - old_q)
+    seen[old_board] = True
+
+@njit(cache=True)
+def play_one_game(Q, seen, epsilon):
     """
     Play one game of Tic-Tac-Toe (X vs O) using epsilon-greedy for both.
     Returns +1 if X wins, -1 if O wins, 0 if draw.
     """
-    state = initial_state()
-    current_symbol = 'X'
-    other_symbol = 'O'
+    board = 0
+    player = 0  # 0 = X, 1 = O
 
-    # Track the last state/action for X and O to update Q
-    last_state = {'X': None, 'O': None}
-    last_action = {'X': None, 'O': None}
+    # Track the last board/action for X and O to update Q (-1 = none yet)
+    last_board = np.full(2, -1, dtype=np.int64)
+    last_action = np.full(2, -1, dtype=np.int64)
 
     while True:
         # current player picks an action
-        action = epsilon_greedy_action(state, epsilon)
-        if action is None:
+        action = epsilon_greedy_action(Q, board, epsilon)
+        if action < 0:
             # no moves left => draw
-            # update last move with draw reward if needed
             return 0
 
-        # store old state/action for updating
-        old_state = state
-        old_action = action
+        # store old board for updating
+        old_board = board
 
-        # move
-        state = next_state(state, action, current_symbol)
+        # move: X's mask sits in the high 9 bits, O's in the low 9 bits
+        board |= 1 << (action + 9 * (1 - player))
 
         # if we want to do small step updates for each move:
-        if last_state[current_symbol] is not None:
+        if last_board[player] >= 0:
             # update with an intermediate reward of 0
-            update_q_value(last_state[current_symbol],
-                           last_action[current_symbol],
-                           0.0,
-                           old_state)
+            update_q_value(Q, seen, last_board[player], last_action[player],
+                           0.0, old_board)
 
         # check if current player won
-        if check_winner(state, current_symbol):
+        mask = (board >> 9) if player == 0 else (board & 0x1FF)
+        if check_winner(mask):
             # reward this final move
-            update_q_value(old_state, action, REWARD_WIN, state)
+            update_q_value(Q, seen, old_board, action, REWARD_WIN, board)
             # punish the opponent's last move (if any)
-            opp = other_symbol
-            if last_state[opp] is not None:
-                update_q_value(last_state[opp],
-                               last_action[opp],
-                               REWARD_LOSE,
-                               old_state)
-            return +1 if current_symbol == 'X' else -1
+            opp = 1 - player
+            if last_board[opp] >= 0:
+                update_q_value(Q, seen, last_board[opp], last_action[opp],
+                               REWARD_LOSE, old_board)
+            return +1 if player == 0 else -1
 
         # check for draw
-        if is_draw(state):
+        if is_draw(board):
             # reward final move with 0
-            update_q_value(old_state, action, REWARD_DRAW, state)
+            update_q_value(Q, seen, old_board, action, REWARD_DRAW, board)
             return 0
 
         # switch player
-        last_state[current_symbol] = old_state
-        last_action[current_symbol] = old_action
-        current_symbol, other_symbol = other_symbol, current_symbol
-
+        last_board[player] = old_board
+        last_action[player] = action
+        player = 1 - player
 
-def main():
-    load_q_table(SAVE_FILE)
-
-    epsilon = EPSILON_START
-    # We will do an exponential decay from EPSILON_START to EPSILON_END
-    if EPSILON_START > 0:
-        decay = (EPSILON_END / EPSILON_START) ** (1.0 / EPISODES)
+@njit(cache=True)
+def train(Q, seen, episodes, epsilon_start, epsilon_end):
+    """
+    Run all self-play episodes, decaying epsilon exponentially from
+    epsilon_start to epsilon_end. Returns (x_wins, o_wins, draws, epsilon).
+    """
+    epsilon = epsilon_start
+    if epsilon_start > 0:
+        decay = (epsilon_end / epsilon_start) ** (1.0 / episodes)
     else:
         decay = 1.0
 
@@ -192,8 +226,8 @@ def main():
     o_wins = 0
     draws = 0
 
-    for episode in range(EPISODES):
-        result = play_one_game(epsilon)
+    for episode in range(episodes):
+        result = play_one_game(Q, seen, epsilon)
         if result == +1:
             x_wins += 1
         elif result == -1:
@@ -202,7 +236,16 @@ def main():
             draws += 1
 
         # Decay epsilon
-        epsilon = max(EPSILON_END, epsilon * decay)
+        epsilon = max(epsilon_end, epsilon * decay)
+
+    return x_wins, o_wins, draws, epsilon
+
+
+def main():
+    load_q_table(SAVE_FILE)
+
+    # The whole self-play loop runs inside compiled code
+    x_wins, o_wins, draws, epsilon = train(Q, SEEN, EPISODES, EPSILON_START, EPSILON_END)
 
     print(f"Training completed after {EPISODES} games.")
     print(f"X wins: {x_wins}, O wins: {o_wins}, Draws: {draws}, epsilon={epsilon:.4f}")